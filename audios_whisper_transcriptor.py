@@ -1,3 +1,4 @@
+from segments_columnar_store import read_dataset, write_columns, write_records
 from transformers.pipelines.audio_utils import ffmpeg_read
 from transformers import pipeline
 import torch
@@ -30,12 +31,13 @@ def init_pipeline(model_name:str) -> pipeline:
     return pipe
 
 
-def transcribe(filepath:str, pipe:pipeline, chunks_folder:str) -> str:
+def transcribe(filepath:str, pipe:pipeline, chunks_folder:str, columnar:bool=False) -> str:
     """
     Transcribe the audio file
     :param filepath: path to the audio file
     :param pipe: pipeline object
     :param chunks_folder: folder where the chunks will be saved
+    :param columnar: if True, chunks_folder is a Parquet dataset partitioned by video
     :return: log message
     """
     
@@ -51,7 +53,12 @@ def transcribe(filepath:str, pipe:pipeline, chunks_folder:str) -> str:
         return_timestamps=True
     )["chunks"]
 
-    output_path = os.path.join(chunks_folder, os.path.basename(filepath).split(".")[0] + ".jsonl")
+    video_id = os.path.basename(filepath).split(".")[0]
+
+    if columnar:
+        return write_records(chunks, video_id, chunks_folder)
+
+    output_path = os.path.join(chunks_folder, video_id + ".jsonl")
     with open(output_path, "w") as f:
         for chunk in chunks:
             f.write(json.dumps(chunk) + "\n")
@@ -59,6 +66,42 @@ def transcribe(filepath:str, pipe:pipeline, chunks_folder:str) -> str:
     return f"Transcription saved to {output_path}."
 
 
+def _merge_chunks(texts, starts, ends, length:int) -> tuple:
+    """
+    Merge consecutive chunks into segments of the desired length
+    :param texts: texts of the chunks
+    :param starts: start timestamps of the chunks
+    :param ends: end timestamps of the chunks
+    :param length: length of the segments in seconds
+    :return: texts, starts and ends of the segments
+    """
+    segment_texts, segment_starts, segment_ends = [], [], []
+    current_text, current_start, current_end = '', 0, 0
+    current_segment_length = 0
+    for text, start, end in zip(texts, starts, ends):
+        # whisper may leave the end of the last chunk open
+        if end is None:
+            end = start
+        chunk_length = end - start
+        if current_segment_length + chunk_length > length:
+            segment_texts.append(current_text)
+            segment_starts.append(current_start)
+            segment_ends.append(current_end)
+            current_text, current_start, current_end = text, start, end
+            current_segment_length = chunk_length
+        else:
+            current_text += text
+            current_end = end
+            current_segment_length += chunk_length
+
+    # last segment
+    segment_texts.append(current_text)
+    segment_starts.append(current_start)
+    segment_ends.append(current_end)
+
+    return segment_texts, segment_starts, segment_ends
+
+
 def segment(filepath:str, segments_folder:str, length:int=60) -> list:
     """
     Segment the chunks to get segments of the desired length
@@ -73,34 +116,39 @@ def segment(filepath:str, segments_folder:str, length:int=60) -> list:
         chunks = [json.loads(line) for line in f.readlines()]
 
     # segment the chunks
-    segments = []
-    current_segment = {'text': '', 'timestamp': [0, 0]}
-    current_segment_length = 0
-    i = 0
-    while i < len(chunks):
-        current_chunk = chunks[i]
-        chunk_length = current_chunk["timestamp"][1] - current_chunk["timestamp"][0]
-        if current_segment_length + chunk_length > length:
-            if len(current_segment) > 0:
-                segments.append(current_segment)
-                current_segment_length = chunk_length
-                current_segment = current_chunk
-            else:
-                segments.append([current_chunk])
-                current_segment_length = 0
-                current_segment = {'text': '', 'timestamp': [0, 0]}
-        else:
-            current_segment['text'] += current_chunk['text']
-            current_segment['timestamp'][1] = current_chunk['timestamp'][1]
-            current_segment_length += chunk_length
-        i += 1
-
-    # last segment
-    segments.append(current_segment)
+    texts, starts, ends = _merge_chunks(
+        [chunk["text"] for chunk in chunks],
+        [chunk["timestamp"][0] for chunk in chunks],
+        [chunk["timestamp"][1] for chunk in chunks],
+        length
+    )
 
     output_path = os.path.join(segments_folder, os.path.basename(filepath))
     with open(output_path, "w") as f:
-        for segment in segments:
-            f.write(json.dumps(segment) + "\n")
+        for text, start, end in zip(texts, starts, ends):
+            f.write(json.dumps({"text": text, "timestamp": [start, end]}) + "\n")
 
     return f"Segments saved to {output_path}."
+
+
+def segment_dataset(video_id:str, chunks_dataset:str, segments_dataset:str, length:int=60) -> str:
+    """
+    Segment the chunks of one video stored in the columnar chunks dataset
+    :param video_id: identifier of the video
+    :param chunks_dataset: root folder of the chunks dataset
+    :param segments_dataset: root folder of the segments dataset
+    :param length: length of the segments in seconds
+    :return: log message
+    """
+
+    # only the partition of the video and the needed columns are read
+    table = read_dataset(chunks_dataset, columns=["text", "start", "end"], video_id=video_id)
+
+    texts, starts, ends = _merge_chunks(
+        table.column("text").to_pylist(),
+        table.column("start").to_pylist(),
+        table.column("end").to_pylist(),
+        length
+    )
+
+    return write_columns(video_id, texts, starts, ends, segments_dataset)
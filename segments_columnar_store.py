@@ -0,0 +1,162 @@
+from urllib.parse import unquote
+import shutil
+import json
+import os
+
+try:
+    import pyarrow.dataset as ds
+    import pyarrow as pa
+except ImportError:  # pyarrow is only needed for the columnar storage format
+    pa = None
+    ds = None
+
+
+# one dataset per collection, one hive partition (video_id=<name>) per video
+SCHEMA_FIELDS = [
+    ("video_id", "string"),
+    ("text", "string"),
+    ("start", "float64"),
+    ("end", "float64"),
+]
+PARTITION_KEY = "video_id"
+
+
+def _require_pyarrow():
+    """
+    Raise an explicit error when the optional pyarrow dependency is missing
+    """
+    if pa is None:
+        raise ImportError("The columnar storage format requires pyarrow: pip install pyarrow")
+
+
+def _schema() -> "pa.Schema":
+    """
+    Schema of the chunks and segments datasets
+    :return: pyarrow schema
+    """
+    _require_pyarrow()
+    return pa.schema([(name, pa.type_for_alias(alias)) for name, alias in SCHEMA_FIELDS])
+
+
+def _partitioning() -> "ds.Partitioning":
+    """
+    Hive partitioning on the video identifier, typed explicitly so that
+    numeric-looking video names are not read back as integers
+    :return: pyarrow partitioning object
+    """
+    _require_pyarrow()
+    return ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive")
+
+
+def _partition_folders(dataset_path:str) -> dict:
+    """
+    Map the videos stored in the dataset to their partition folders
+    :param dataset_path: root folder of the dataset
+    :return: dictionary video identifier -> folder name
+    """
+    prefix = PARTITION_KEY + "="
+    if not os.path.exists(dataset_path):
+        return {}
+    return {
+        unquote(name[len(prefix):]): name for name in os.listdir(dataset_path)
+        if name.startswith(prefix)
+    }
+
+
+def write_columns(video_id:str, texts:list, starts, ends, dataset_path:str) -> str:
+    """
+    Write the chunks or segments of one video into the dataset, replacing
+    the previous partition of this video if it exists
+    :param video_id: identifier of the video (audio file name without extension)
+    :param texts: texts of the chunks or segments
+    :param starts: start timestamps in seconds
+    :param ends: end timestamps in seconds
+    :param dataset_path: root folder of the dataset
+    :return: log message
+    """
+    schema = _schema()
+    table = pa.table(
+        {
+            "video_id": pa.array([video_id] * len(texts), type=pa.string()),
+            "text": pa.array(texts, type=pa.string()),
+            "start": pa.array(starts, type=pa.float64()),
+            "end": pa.array(ends, type=pa.float64()),
+        },
+        schema=schema
+    )
+
+    # an empty table writes no partition, so the previous one is removed explicitly
+    previous_folder = _partition_folders(dataset_path).get(video_id)
+    if previous_folder is not None:
+        shutil.rmtree(os.path.join(dataset_path, previous_folder))
+
+    ds.write_dataset(
+        table,
+        dataset_path,
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching"
+    )
+
+    return f"{len(texts)} rows of {video_id} saved to {dataset_path}."
+
+
+def write_records(records:list, video_id:str, dataset_path:str) -> str:
+    """
+    Write chunks or segments given as {'text', 'timestamp'} dictionaries
+    :param records: list of chunks or segments
+    :param video_id: identifier of the video
+    :param dataset_path: root folder of the dataset
+    :return: log message
+    """
+    texts = [record["text"] for record in records]
+    starts = [record["timestamp"][0] for record in records]
+    ends = [record["timestamp"][1] for record in records]
+    return write_columns(video_id, texts, starts, ends, dataset_path)
+
+
+def read_dataset(dataset_path:str, columns:list=None, video_id:str=None) -> "pa.Table":
+    """
+    Read the dataset, only loading the requested columns and partitions
+    :param dataset_path: root folder of the dataset
+    :param columns: columns to project, all columns if None
+    :param video_id: restrict the scan to the partition of this video
+    :return: pyarrow table
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(dataset_path, format="parquet", schema=_schema(), partitioning=_partitioning())
+    row_filter = ds.field(PARTITION_KEY) == video_id if video_id is not None else None
+    return dataset.to_table(columns=columns, filter=row_filter)
+
+
+def list_videos(dataset_path:str) -> list:
+    """
+    List the videos stored in the dataset from its partition folders
+    :param dataset_path: root folder of the dataset
+    :return: list of video identifiers
+    """
+    return sorted(_partition_folders(dataset_path))
+
+
+def import_jsonl_folder(jsonl_folder:str, dataset_path:str) -> str:
+    """
+    Convert a folder of chunks or segments jsonl files into a dataset
+    :param jsonl_folder: folder containing the jsonl files
+    :param dataset_path: root folder of the dataset
+    :return: log message
+    """
+    _require_pyarrow()
+
+    n_files = 0
+    n_rows = 0
+    for jsonl_file in os.listdir(jsonl_folder):
+        if not jsonl_file.endswith(".jsonl"):
+            continue
+        with open(os.path.join(jsonl_folder, jsonl_file), "r") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        write_records(records, jsonl_file[:-6], dataset_path)
+        n_files += 1
+        n_rows += len(records)
+
+    return f"{n_files} file(s) and {n_rows} rows imported to {dataset_path}."
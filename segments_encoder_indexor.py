@@ -1,3 +1,4 @@
+from segments_columnar_store import read_dataset
 from sentence_transformers import SentenceTransformer
 from qdrant_client import models, QdrantClient
 import pandas as pd
@@ -7,13 +8,24 @@ import re
 import os
 
 
-def encode_and_index(folder_path, collection_name:str, chosen_metadata, qdrant_api_key:str) -> str:
+def _video_hash(name:str) -> int:
+    """
+    Hash a video name into the identifier used to join the playlist metadata
+    :param name: video name (audio file name without extension)
+    :return: identifier
+    """
+    id = re.sub('[^\w]', '', name.replace("_", ""))
+    return abs(hash(id)) % (10 ** 8)
+
+
+def encode_and_index(folder_path, collection_name:str, chosen_metadata, qdrant_api_key:str, columnar:bool=False) -> str:
     """
     Encode the segments in the folder and index them into a vector database.
     :param folder_path: path to the folder containing the segments
     :param collection_name: name of the collection to create
     :param chosen_metadata: list of metadata to enrich the vectors
     :param qdrant_api_key: API key for the Qdrant vector database
+    :param columnar: if True, folder_path is a Parquet segments dataset partitioned by video
     :return: message with the number of segments indexed
     """
 
@@ -31,28 +43,45 @@ def encode_and_index(folder_path, collection_name:str, chosen_metadata, qdrant_a
     encoder = SentenceTransformer("all-MiniLM-L6-v2")
 
     # load the segments and the payloads and create the indexes
-    all_segments = []
+    all_texts = []
     payloads = []
     idx = []
 
-    for segment_file in os.listdir(folder_path):
-        segment_path = os.path.join(folder_path, segment_file)
-        id = re.sub('[^\w]', '', segment_file[:-6].replace("_", ""))
-        id = abs(hash(id)) % (10 ** 8)
-        payload = metadata_dict[id]
-        with open(segment_path, "r") as f:
-            segments = [json.loads(l) for l in f.readlines()]
-            for i, segment in enumerate(segments):
-                all_segments.append(segment)
-                current_segment_payload = payload.copy()
-                current_segment_payload.update(
-                    {
-                        "Text": segment["text"],
-                        "Start": segment["timestamp"][0], 
-                        "End": segment["timestamp"][1]}
-                    )
-                payloads.append(current_segment_payload)
-                idx.append(abs(hash(id+i)) % (10 ** 10))
+    if columnar:
+        # single scan of the whole collection, one column list per field
+        table = read_dataset(folder_path, columns=["video_id", "text", "start", "end"])
+        video_ids = table.column("video_id").to_pylist()
+        all_texts = table.column("text").to_pylist()
+        starts = table.column("start").to_pylist()
+        ends = table.column("end").to_pylist()
+
+        # rank of each segment within its video, as in the jsonl files
+        video_hashes = {video_id: _video_hash(video_id) for video_id in set(video_ids)}
+        ranks = {}
+        for video_id, text, start, end in zip(video_ids, all_texts, starts, ends):
+            id = video_hashes[video_id]
+            i = ranks.get(video_id, 0)
+            ranks[video_id] = i + 1
+            payloads.append({**metadata_dict[id], "Text": text, "Start": start, "End": end})
+            idx.append(abs(hash(id+i)) % (10 ** 10))
+    else:
+        for segment_file in os.listdir(folder_path):
+            segment_path = os.path.join(folder_path, segment_file)
+            id = _video_hash(segment_file[:-6])
+            payload = metadata_dict[id]
+            with open(segment_path, "r") as f:
+                segments = [json.loads(l) for l in f.readlines()]
+                for i, segment in enumerate(segments):
+                    all_texts.append(segment["text"])
+                    current_segment_payload = payload.copy()
+                    current_segment_payload.update(
+                        {
+                            "Text": segment["text"],
+                            "Start": segment["timestamp"][0], 
+                            "End": segment["timestamp"][1]}
+                        )
+                    payloads.append(current_segment_payload)
+                    idx.append(abs(hash(id+i)) % (10 ** 10))
     
     # create the index
     qdrant_client = QdrantClient(
@@ -69,19 +98,22 @@ def encode_and_index(folder_path, collection_name:str, chosen_metadata, qdrant_a
 	    )
     )
 
+    # encode all the segments in batches
+    vectors = encoder.encode(all_texts)
+
     # upload the segments
     qdrant_client.upload_records(
 	    collection_name=collection_name,
 	    records=[
 		    models.Record(
 			    id=id,
-			    vector=encoder.encode(segment["text"]).tolist(),
+			    vector=vector.tolist(),
 			    payload=payload
-		    ) for id, segment, payload in zip(idx, all_segments, payloads)
+		    ) for id, vector, payload in zip(idx, vectors, payloads)
 	    ]
     )
 
-    return f"Segments indexed: {len(all_segments)}"
+    return f"Segments indexed: {len(all_texts)}"
 
 
 def query_index(question:str, collection_name:str, qdrant_api_key:str, top_k:int=3) -> list:
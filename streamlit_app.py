@@ -1,5 +1,6 @@
 from segments_encoder_indexor import encode_and_index, query_index, list_collections, answer_question
-from audios_whisper_transcriptor import init_pipeline, transcribe, segment
+from audios_whisper_transcriptor import init_pipeline, transcribe, segment, segment_dataset
+from segments_columnar_store import import_jsonl_folder, list_videos
 from videos_stream_retriever import extract_audio_from_playlist
 import streamlit as st
 import os
@@ -27,6 +28,38 @@ def _init_pipeline(model_name):
 
 st.title("YouTube Playlist Semantic Search")
 
+st.markdown("""
+    The chunks and segments are stored by default as one jsonl file per video. They can
+    instead be stored as one Parquet dataset per collection, partitioned by video
+    (requires pyarrow).
+""")
+
+use_columnar = st.checkbox("Columnar storage (Parquet)", value=False)
+chunks_root = "./outputs/columnar/chunks" if use_columnar else "./outputs/chunks"
+segments_root = "./outputs/columnar/segments" if use_columnar else "./outputs/segments"
+for root in (chunks_root, segments_root):
+    if not os.path.exists(root):
+        os.makedirs(root)
+
+if use_columnar:
+    with st.expander("Import existing jsonl transcriptions"):
+        st.markdown("""
+            Convert the chunks and segments jsonl files of a collection into
+            the columnar datasets.
+        """)
+        jsonl_collections = os.listdir("./outputs/chunks") if os.path.exists("./outputs/chunks") else []
+        jsonl_collection_name = st.selectbox("Collection of jsonl files", options=jsonl_collections)
+        import_button = st.button("Import selected collection")
+
+    if import_button and jsonl_collection_name:
+        import_log = []
+        for jsonl_root, root in (("./outputs/chunks", chunks_root), ("./outputs/segments", segments_root)):
+            jsonl_folder = os.path.join(jsonl_root, jsonl_collection_name)
+            if os.path.exists(jsonl_folder):
+                msg = import_jsonl_folder(jsonl_folder, os.path.join(root, jsonl_collection_name))
+                import_log.append(msg)
+        st.write(import_log)
+
 st.subheader("Upload YouTube videos playlist")
 
 st.markdown("""
@@ -121,8 +154,8 @@ mp3_collection_name = st.selectbox("Collection of audio files", options=mp3_coll
 mp3_collection_path = os.path.join("./mp3", mp3_collection_name)
 
 # set the output chunks folder
-chunks_folder =  os.path.join("./outputs/chunks", mp3_collection_name)
-if not os.path.exists(chunks_folder):
+chunks_folder =  os.path.join(chunks_root, mp3_collection_name)
+if not use_columnar and not os.path.exists(chunks_folder):
     os.mkdir(chunks_folder)
 
 # select the whisper model to be used
@@ -140,7 +173,7 @@ if transcript_streams_button and mp3_collection_path:
     k = 0
     for audio_file in os.listdir(mp3_collection_path):
         audio_path = os.path.join(mp3_collection_path, audio_file)
-        msg = transcribe(audio_path, pipe, chunks_folder)
+        msg = transcribe(audio_path, pipe, chunks_folder, columnar=use_columnar)
         transcription_log.append(msg)
         if k > 2:
             break
@@ -166,16 +199,18 @@ st.info("""
 """)
 
 # list of chunks collections
-chunks_collections = os.listdir("./outputs/chunks")
+chunks_collections = os.listdir(chunks_root)
 
 # select the chunks collection folder
 chunks_collection_name = st.selectbox("Collection of text chunks", options=chunks_collections)
-chunks_collection_path = os.path.join("./outputs/chunks", chunks_collection_name)
+chunks_collection_path = None
+if chunks_collection_name:
+    chunks_collection_path = os.path.join(chunks_root, chunks_collection_name)
 
-# set the output chunks folder
-segments_folder =  os.path.join("./outputs/segments", chunks_collection_name)
-if not os.path.exists(segments_folder):
-    os.mkdir(segments_folder)
+    # set the output chunks folder
+    segments_folder =  os.path.join(segments_root, chunks_collection_name)
+    if not use_columnar and not os.path.exists(segments_folder):
+        os.mkdir(segments_folder)
 
 
 with st.form(key="segment_form"):
@@ -188,10 +223,15 @@ with st.form(key="segment_form"):
 
 if segment_chunks_button and chunks_collection_path:
     segmentation_log = []
-    for chunk_file in os.listdir(chunks_collection_path):
-        chunk_path = os.path.join(chunks_collection_path, chunk_file)
-        msg = segment(chunk_path, segments_folder, segment_length)
-        segmentation_log.append(msg)
+    if use_columnar:
+        for video_id in list_videos(chunks_collection_path):
+            msg = segment_dataset(video_id, chunks_collection_path, segments_folder, segment_length)
+            segmentation_log.append(msg)
+    else:
+        for chunk_file in os.listdir(chunks_collection_path):
+            chunk_path = os.path.join(chunks_collection_path, chunk_file)
+            msg = segment(chunk_path, segments_folder, segment_length)
+            segmentation_log.append(msg)
     
      # add some fun
     st.balloons()
@@ -215,11 +255,13 @@ st.info("""
 st.info("""The encoding model is all-MiniLM-L6-v2.""")
 
 # list of segments collections
-segments_collections = os.listdir("./outputs/segments")
+segments_collections = os.listdir(segments_root)
 
 # select the segments collection folder
 segments_collection_name = st.selectbox("Collection of text segments", options=segments_collections)
-segments_collection_path = os.path.join("./outputs/segments", segments_collection_name)
+segments_collection_path = None
+if segments_collection_name:
+    segments_collection_path = os.path.join(segments_root, segments_collection_name)
 
 # encode the segments button
 encode_segments_button = st.button("Encode and Index selected segments")
@@ -229,7 +271,8 @@ if encode_segments_button and segments_collection_path:
         segments_collection_path, 
         segments_collection_name, 
         chosen_metadata,
-        qdrant_api_key=st.secrets["QDRANT_API_KEY"]
+        qdrant_api_key=st.secrets["QDRANT_API_KEY"],
+        columnar=use_columnar
     )
     
      # add some fun